@@ -2,50 +2,92 @@
 # loads markets from pool and executes limit orders at ask+2cents
 
 import base64
-import json
 import os
 import random
 import time
-from typing import Dict, List, Tuple
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 
+import orjson
 import requests
-from cryptography.hazmat.primitives import serialization, hashes
-from cryptography.hazmat.primitives.asymmetric import padding
-from dotenv import load_dotenv
+
+from creds import load_credentials
+from http_session import make_session
 
 BASE_URL = "https://api.elections.kalshi.com/trade-api/v2"
+ORDERS_PATH = "/trade-api/v2/portfolio/orders"
 
+MAX_ORDER_WORKERS = 8  # concurrent order posts when choose="all"
 
-def sign_request(method: str, path: str, body: str, timestamp_ms: str, key_id: str, private_key_pem: str) -> str:
-    """signs api requests with rsa-pss
-    
-    kalshi wants: timestamp + method + path (no query params or body)
-    returns base64 encoded signature
-    """
-    # load private key
-    private_key = serialization.load_pem_private_key(
+# one session for every order so we only pay the tls handshake once
+# posts are only retried when kalshi proves the order wasn't accepted (429), never after
+# a read timeout or 5xx where the first attempt may already have landed
+_SESSION = make_session(
+    allowed_methods=["POST"],
+    status_forcelist=[429],
+    retry_after_send=False,
+)
+
+
+def get_session() -> requests.Session:
+    """returns the shared http session (mount extra adapters on it if needed)"""
+    return _SESSION
+
+
+@lru_cache(maxsize=4)
+def _load_key(private_key_pem: str):
+    """parses the pem once, the key never changes within a run"""
+    # cryptography is imported on first use so runs that never sign skip loading it
+    from cryptography.hazmat.primitives import serialization
+
+    return serialization.load_pem_private_key(
         private_key_pem.encode('utf-8'),
         password=None
     )
-    
-    # strip query params if any
-    path_without_query = path.split('?')[0]
-    
-    # make the message string
-    message_string = timestamp_ms + method + path_without_query
-    message_bytes = message_string.encode('utf-8')
-    
-    # sign it
-    signature = private_key.sign(
-        message_bytes,
-        padding.PSS(
+
+
+class _Signer:
+    """signs kalshi requests for one method + path with an already-loaded key
+
+    kalshi wants: timestamp + method + path (no query params or body)
+    method + path never change across orders, so their bytes are built once
+    and each sign() only pays for the rsa-pss op itself
+    """
+
+    def __init__(self, key_id: str, private_key, method: str = "POST", path: str = ORDERS_PATH):
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.asymmetric import padding
+
+        self.key_id = key_id
+        self._private_key = private_key
+        # strip query params if any
+        self._method_path_bytes = (method + path.split('?')[0]).encode('utf-8')
+        self._padding = padding.PSS(
             mgf=padding.MGF1(hashes.SHA256()),
             salt_length=padding.PSS.DIGEST_LENGTH
-        ),
-        hashes.SHA256()
-    )
+        )
+        self._hash = hashes.SHA256()
+
+    def sign(self, timestamp_ms: str) -> str:
+        """returns base64 encoded signature for this timestamp"""
+        signature = self._private_key.sign(
+            timestamp_ms.encode('utf-8') + self._method_path_bytes,
+            self._padding,
+            self._hash
+        )
+        return base64.b64encode(signature).decode('utf-8')
+
+
+def sign_request(method: str, path: str, body: str, timestamp_ms: str, key_id: str, private_key_pem: str) -> str:
+    """signs api requests with rsa-pss
     
-    return base64.b64encode(signature).decode('utf-8')
+    kalshi wants: timestamp + method + path (no query params or body)
+    returns base64 encoded signature
+    """
+    # private key is cached after the first call
+    return _Signer(key_id, _load_key(private_key_pem), method, path).sign(timestamp_ms)
 
 
 def _choose_side(side_strategy: str) -> str:
@@ -90,29 +132,74 @@ def _headers_for_kalshi(key_id: str, signature_b64: str, timestamp_ms: str) -> D
     }
 
 
-def _post_create_order(order_body: Dict, key_id: str, private_key_pem: str) -> Dict:
+def _post_create_order(order_body: Dict, signer: _Signer) -> Dict:
     """posts order to kalshi api with proper auth"""
-    path = "/trade-api/v2/portfolio/orders"
-    url = f"https://api.elections.kalshi.com{path}"
+    url = f"https://api.elections.kalshi.com{ORDERS_PATH}"
 
-    body_text = json.dumps(order_body, separators=(",", ":"))
+    body_bytes = orjson.dumps(order_body)  # already compact utf-8, goes on the wire as is
     timestamp_ms = str(int(time.time() * 1000))
 
     # sign the request
-    signature_b64 = sign_request(
-        method="POST",
-        path=path,
-        body=body_text,
-        timestamp_ms=timestamp_ms,
-        key_id=key_id,
-        private_key_pem=private_key_pem,
-    )
+    signature_b64 = signer.sign(timestamp_ms)
 
-    headers = _headers_for_kalshi(key_id, signature_b64, timestamp_ms)
+    headers = _headers_for_kalshi(signer.key_id, signature_b64, timestamp_ms)
 
-    r = requests.post(url, data=body_text, headers=headers, timeout=20)
+    r = _SESSION.post(url, data=body_bytes, headers=headers, timeout=20)
     r.raise_for_status()
-    return r.json()
+    return orjson.loads(r.content)
+
+
+def _build_order_body(m: Dict, side_strategy: str, use_market_orders: bool) -> Dict:
+    """builds the buy order body for one market"""
+    ticker = m["ticker"]
+    side = _choose_side(side_strategy)
+
+    # build order (1 contract, gtc)
+    body = {
+        "ticker": ticker,
+        "side": side,
+        "action": "buy",
+        "count": 1,
+        "time_in_force": "GTC",  # good til cancelled
+        "client_order_id": str(uuid.uuid4()),  # lets kalshi dedupe retried posts
+    }
+
+    if use_market_orders:
+        body["type"] = "market"
+    else:
+        # limit order at ask + buffer
+        body["type"] = "limit"
+        if side == "yes":
+            body["yes_price"] = _limit_price_cents_for_buy("yes", m)
+        else:
+            body["no_price"] = _limit_price_cents_for_buy("no", m)
+
+    return body
+
+
+def _submit_order(body: Dict, signer: _Signer) -> Optional[Tuple[str, Dict]]:
+    """signs and posts a single order, returns (ticker, response) or None on failure"""
+    ticker, side = body["ticker"], body["side"]
+    try:
+        resp = _post_create_order(order_body=body, signer=signer)
+        print(f"ORDER OK  | {ticker} | side={side} | resp_status={resp.get('order',{}).get('status')}")
+        return ticker, resp
+    except requests.HTTPError as e:
+        try:
+            error_msg = e.response.text[:200]
+            print(f"ORDER HTTP ERROR | {ticker} | {e.response.status_code} | {error_msg}")
+            
+            # helpful hint for insufficient volume
+            if "insufficient_resting_volume" in error_msg.lower():
+                print(f"  note: market has no liquidity at your price level")
+                print(f"  tip: don't spam the script, liquidity needs time to replenish")
+                
+        except Exception:
+            print(f"ORDER HTTP ERROR | {ticker} | {e}")
+    except Exception as e:
+        print(f"ORDER ERROR | {ticker} | {e}")
+
+    return None
 
 
 def buy_from_pool(
@@ -141,73 +228,37 @@ def buy_from_pool(
     else:
         targets = list(pool)
 
-    results: List[Tuple[str, Dict]] = []
-
-    for m in targets:
-        ticker = m["ticker"]
-        side = _choose_side(side_strategy)
-
-        # build order (1 contract, gtc)
-        body = {
-            "ticker": ticker,
-            "side": side,
-            "action": "buy",
-            "count": 1,
-            "time_in_force": "GTC",  # good til cancelled
-        }
+    # load the key once and reuse it for every order
+    try:
+        signer = _Signer(kalshi_key_id, _load_key(private_key_pem))
+    except Exception as e:
+        print(f"could not load private key: {e}")
+        return []
 
-        if use_market_orders:
-            body["type"] = "market"
-        else:
-            # limit order at ask + buffer
-            body["type"] = "limit"
-            if side == "yes":
-                body["yes_price"] = _limit_price_cents_for_buy("yes", m)
-            else:
-                body["no_price"] = _limit_price_cents_for_buy("no", m)
+    # build every body up front so the workers only sign and post
+    bodies = [_build_order_body(m, side_strategy, use_market_orders) for m in targets]
 
-        try:
-            resp = _post_create_order(order_body=body, key_id=kalshi_key_id, private_key_pem=private_key_pem)
-            print(f"ORDER OK  | {ticker} | side={side} | resp_status={resp.get('order',{}).get('status')}")
-            results.append((ticker, resp))
-        except requests.HTTPError as e:
-            try:
-                error_msg = e.response.text[:200]
-                print(f"ORDER HTTP ERROR | {ticker} | {e.response.status_code} | {error_msg}")
-                
-                # helpful hint for insufficient volume
-                if "insufficient_resting_volume" in error_msg.lower():
-                    print(f"  note: market has no liquidity at your price level")
-                    print(f"  tip: don't spam the script, liquidity needs time to replenish")
-                    
-            except Exception:
-                print(f"ORDER HTTP ERROR | {ticker} | {e}")
-        except Exception as e:
-            print(f"ORDER ERROR | {ticker} | {e}")
+    # orders are independent, so post them concurrently over the shared session
+    if len(bodies) == 1:
+        placed = [_submit_order(bodies[0], signer)]
+    else:
+        with ThreadPoolExecutor(max_workers=MAX_ORDER_WORKERS) as ex:
+            placed = list(ex.map(lambda body: _submit_order(body, signer), bodies))
 
-    return results
+    return [r for r in placed if r is not None]
 
 
 # standalone usage: load pool from json and trade
 if __name__ == "__main__":
-    load_dotenv()
-    
     if not os.path.exists("pool.json"):
         print("pool.json not found. run pool_builder.py first.")
         raise SystemExit(1)
 
-    with open("pool.json", "r") as f:
-        pool = json.load(f)
+    with open("pool.json", "rb") as f:
+        pool = orjson.loads(f.read())
 
     # load creds
-    key_id = os.environ.get("KALSHI_ACCESS_KEY_ID", "")
-    
-    private_pem = os.environ.get("KALSHI_PRIVATE_KEY_PEM", "")
-    if not private_pem:
-        key_path = os.environ.get("KALSHI_PRIVATE_KEY_PATH", "")
-        if key_path and os.path.exists(key_path):
-            with open(key_path, "r") as f:
-                private_pem = f.read()
+    key_id, private_pem = load_credentials()
     
     if not key_id or not private_pem:
         print("missing credentials. check .env file")
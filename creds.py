@@ -0,0 +1,27 @@
+# loads kalshi api credentials from .env
+# shared by main.py and buy.py so the pem file is only read once per run
+
+import os
+from functools import lru_cache
+from typing import Tuple
+
+from dotenv import load_dotenv
+
+
+@lru_cache(maxsize=1)
+def load_credentials() -> Tuple[str, str]:
+    """returns (key_id, private_pem), either is empty if missing
+
+    tries the pem from env var first, then from file
+    """
+    load_dotenv()
+    key_id = os.environ.get("KALSHI_ACCESS_KEY_ID", "")
+
+    private_pem = os.environ.get("KALSHI_PRIVATE_KEY_PEM", "")
+    if not private_pem:
+        key_path = os.environ.get("KALSHI_PRIVATE_KEY_PATH", "")
+        if key_path and os.path.exists(key_path):
+            with open(key_path, "r") as f:
+                private_pem = f.read()
+
+    return key_id, private_pem
@@ -0,0 +1,40 @@
+# builds the pooled http sessions used for kalshi api calls
+# shared by pool_builder.py and buy.py so their retry policies live in one place
+
+from typing import List
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def make_session(
+    allowed_methods: List[str],
+    status_forcelist: List[int],
+    pool_maxsize: int = 16,
+    retry_after_send: bool = True,
+) -> requests.Session:
+    """returns a keep-alive session with retry/backoff mounted on https
+
+    retries reuse the pooled connection instead of paying a new tls handshake
+    retry_after_send=False skips retries on read/other errors, where the first
+    attempt may already have reached the server
+    raise_on_status=False hands the last response back so raise_for_status still applies
+    """
+    retry = Retry(
+        total=3,
+        read=None if retry_after_send else 0,
+        other=None if retry_after_send else 0,
+        backoff_factor=0.2,
+        status_forcelist=status_forcelist,
+        allowed_methods=allowed_methods,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    session = requests.Session()
+    session.mount(
+        "https://",
+        HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=retry),
+    )
+    session.headers.update({"User-Agent": "kalshi-bot"})
+    return session
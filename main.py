@@ -2,9 +2,7 @@
 # everything happens in memory, no files involved
 # run once every 30 minutes via cron
 
-import os
-from dotenv import load_dotenv
-
+from creds import load_credentials
 from pool_builder import build_pool
 from buy import buy_from_pool
 
@@ -15,16 +13,7 @@ def main():
     print("=" * 70)
     
     # grab credentials from .env
-    load_dotenv()
-    key_id = os.environ.get("KALSHI_ACCESS_KEY_ID", "")
-    
-    # try loading pem from env var first, then from file
-    private_pem = os.environ.get("KALSHI_PRIVATE_KEY_PEM", "")
-    if not private_pem:
-        key_path = os.environ.get("KALSHI_PRIVATE_KEY_PATH", "")
-        if key_path and os.path.exists(key_path):
-            with open(key_path, "r") as f:
-                private_pem = f.read()
+    key_id, private_pem = load_credentials()
     
     if not key_id or not private_pem:
         print("missing credentials in .env file")
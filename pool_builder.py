@@ -1,13 +1,18 @@
 # fetches crypto markets from kalshi and filters for good trading opportunities
 # picks the next closing event per series and keeps liquid markets with tight spreads
 
-import json
+import heapq
 import time
-from datetime import datetime
-from typing import Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, Iterator, List, Tuple
 
+import orjson
 import requests
 
+from http_session import make_session
+
 BASE_URL = "https://api.elections.kalshi.com/trade-api/v2"
 
 # crypto series we trade
@@ -19,9 +24,38 @@ MIN_LIQUIDITY_CENTS = 1000  # at least $10 in the order book
 TOP_N_LIQUID_PER_EVENT = 50  # keep top 50 most liquid per event
 MIN_TIME_BUFFER_MINUTES = 5  # events must close at least 5 min in future
 
+# one session for every call so pagination reuses the same tls connection
+# pool_maxsize must stay >= len(SERIES) since build_pool fetches series in parallel
+_SESSION = make_session(
+    allowed_methods=["GET"],
+    status_forcelist=[429, 502, 503, 504],
+    pool_maxsize=max(16, len(SERIES)),
+)
+
+
+def get_session() -> requests.Session:
+    """returns the shared http session (mount extra adapters on it if needed)"""
+    return _SESSION
 
+
+@lru_cache(maxsize=8192)
 def parse_iso_utc(s: str) -> float:
     """converts iso timestamp to epoch seconds, returns inf if invalid"""
+    # fast path for kalshi's fixed YYYY-MM-DDTHH:MM:SSZ format, skips fromisoformat
+    # datetime() still validates the fields, anything odd falls through to the generic path
+    if (
+        isinstance(s, str) and len(s) == 20
+        and s[4] == s[7] == "-" and s[10] == "T" and s[13] == s[16] == ":" and s[19] == "Z"
+    ):
+        try:
+            return datetime(
+                int(s[0:4]), int(s[5:7]), int(s[8:10]),
+                int(s[11:13]), int(s[14:16]), int(s[17:19]),
+                tzinfo=timezone.utc,
+            ).timestamp()
+        except ValueError:
+            pass
+
     try:
         if s.endswith("Z"):
             dt = datetime.fromisoformat(s.replace("Z", "+00:00"))
@@ -40,92 +74,94 @@ def get_open_markets_for_series(series_ticker: str, limit: int = 1000) -> List[D
         if cursor:
             params["cursor"] = cursor
 
-        r = requests.get(f"{BASE_URL}/markets", params=params, timeout=25)
+        r = _SESSION.get(f"{BASE_URL}/markets", params=params, timeout=25)
         r.raise_for_status()
-        data = r.json()
+        # plain dicts on purpose: markets go straight into the pool, pool.json and buy.py
+        data = orjson.loads(r.content)
 
-        markets.extend(data.get("markets", []))
+        page = data.get("markets", [])
+        markets.extend(page)
         cursor = data.get("cursor")
-        if not cursor:
+        # only the cursor says whether more pages exist, the server may cap page size below limit
+        if not cursor or not page:
             break
 
     return markets
 
 
-def group_by_event(markets: List[Dict]) -> Dict[str, List[Dict]]:
+def group_by_event(markets: List[Dict]) -> Tuple[Dict[str, List[Dict]], Dict[str, float]]:
     """groups markets by event ticker
     one event = one hourly card, contains many strikes
+
+    also tracks each event's earliest close time in the same pass so picking
+    the event doesn't have to walk the markets again
     """
     by_evt: Dict[str, List[Dict]] = {}
+    close_by_evt: Dict[str, float] = {}
     for m in markets:
         evt = m.get("event_ticker")
         if not evt:
             continue
         by_evt.setdefault(evt, []).append(m)
-    return by_evt
+        # strikes share close_time strings, parse_iso_utc is memoized
+        ct = parse_iso_utc(m.get("close_time", ""))
+        if ct < close_by_evt.get(evt, float("inf")):
+            close_by_evt[evt] = ct
+    return by_evt, close_by_evt
 
 
-def pick_soonest_future_event(by_event: Dict[str, List[Dict]]) -> Tuple[str, List[Dict]]:
+def pick_soonest_future_event(
+    by_event: Dict[str, List[Dict]], close_by_event: Dict[str, float]
+) -> Tuple[str, List[Dict]]:
     """picks the event that closes soonest in the future (with time buffer)"""
-    if not by_event:
+    if not close_by_event:
         return None, []
 
     now_ts = time.time()
     min_close_ts = now_ts + (MIN_TIME_BUFFER_MINUTES * 60)
-    best_evt, best_close = None, float("inf")
-
-    # pass 1: events with buffer
-    for evt, group in by_event.items():
-        ct = min((parse_iso_utc(g.get("close_time", "")) for g in group), default=float("inf"))
-        if ct >= min_close_ts and ct < best_close:
-            best_evt, best_close = evt, ct
-
-    # pass 2: events without buffer (fallback)
-    if best_evt is None:
-        for evt, group in by_event.items():
-            ct = min((parse_iso_utc(g.get("close_time", "")) for g in group), default=float("inf"))
-            if ct >= now_ts and ct < best_close:
-                best_evt, best_close = evt, ct
-
-    # pass 3: any event (emergency fallback)
-    if best_evt is None:
-        for evt, group in by_event.items():
-            ct = min((parse_iso_utc(g.get("close_time", "")) for g in group), default=float("inf"))
-            if ct < best_close:
-                best_evt, best_close = evt, ct
+
+    # events with buffer, then without buffer (fallback), then any event (emergency fallback)
+    best_evt = None
+    for earliest in (min_close_ts, now_ts, float("-inf")):
+        best = min(
+            (c for c in close_by_event.items() if c[1] >= earliest),
+            key=lambda c: c[1],
+            default=None,
+        )
+        if best is not None:
+            best_evt = best[0]
+            break
 
     return best_evt, by_event.get(best_evt, [])
 
 
-def yes_spread(m: Dict) -> float:
-    """calculates yes spread (ask - bid)
-    returns inf if missing or if market is dead (0/0 or 100/100)
-    """
-    yb, ya = m.get("yes_bid"), m.get("yes_ask")
-    if isinstance(yb, (int, float)) and isinstance(ya, (int, float)):
-        # filter dead markets
-        if (yb == 0 and ya == 0) or (yb == 100 and ya == 100):
-            return float("inf")
-        return float(ya - yb)
-    return float("inf")
-
-
-def no_spread(m: Dict) -> float:
-    """calculates no spread (ask - bid)
-    returns inf if missing or if market is dead
-    """
-    nb, na = m.get("no_bid"), m.get("no_ask")
-    if isinstance(nb, (int, float)) and isinstance(na, (int, float)):
-        if (nb == 0 and na == 0) or (nb == 100 and na == 100):
-            return float("inf")
-        return float(na - nb)
-    return float("inf")
+def tradeable_rows(ladder: List[Dict]) -> Iterator[Tuple[int, int, int, Dict]]:
+    """yields (liquidity, yes spread, no spread, market) for strikes that pass the filters"""
+    for m in ladder:
+        liq = m.get("liquidity", 0)
+        if liq < MIN_LIQUIDITY_CENTS:
+            continue
+
+        # skip missing quotes and dead markets (0/0 or 100/100) before doing any math
+        yb, ya = m.get("yes_bid"), m.get("yes_ask")
+        if yb is None or ya is None or (yb == ya and yb in (0, 100)):
+            continue
+        ys = ya - yb
+        if ys >= MAX_SPREAD_CENTS:
+            continue
+
+        nb, na = m.get("no_bid"), m.get("no_ask")
+        if nb is None or na is None or (nb == na and nb in (0, 100)):
+            continue
+        ns = na - nb
+        if ns < MAX_SPREAD_CENTS:
+            yield liq, ys, ns, m
 
 
 def build_pool() -> List[Dict]:
     """builds pool of tradeable markets
     
-    for each series:
+    fetches every series concurrently, then for each series:
     - picks next closing event
     - filters by spread and liquidity
     - keeps top n most liquid
@@ -134,46 +170,47 @@ def build_pool() -> List[Dict]:
     """
     pool: List[Dict] = []
 
+    # fetch all open markets, series are independent so do them in parallel
+    with ThreadPoolExecutor(max_workers=len(SERIES)) as ex:
+        markets_by_series = dict(zip(SERIES, ex.map(get_open_markets_for_series, SERIES)))
+    now_ts = time.time()
+
     for series in SERIES:
-        # fetch all open markets
-        mkts = get_open_markets_for_series(series)
+        mkts = markets_by_series[series]
 
-        # group by event and pick soonest
-        by_evt = group_by_event(mkts)
-        evt_ticker, ladder = pick_soonest_future_event(by_evt)
+        # group by event (tracking close times) and pick soonest
+        by_evt, close_by_evt = group_by_event(mkts)
+        evt_ticker, ladder = pick_soonest_future_event(by_evt, close_by_evt)
         if not evt_ticker or not ladder:
             print(f"{series}: no open event found")
             continue
 
-        # filter by spread and liquidity
-        filtered = []
-        for m in ladder:
-            ys = yes_spread(m)
-            ns = no_spread(m)
-            liq = m.get("liquidity", 0)
-            
-            if ys < MAX_SPREAD_CENTS and ns < MAX_SPREAD_CENTS and liq >= MIN_LIQUIDITY_CENTS:
-                m = dict(m)  # copy
-                m["_yes_spread"] = ys
-                m["_no_spread"] = ns
-                m["_event_ticker"] = evt_ticker
-                filtered.append(m)
-
-        if not filtered:
+        # filter by spread and liquidity straight into a bounded top-n by liquidity,
+        # no intermediate filtered list
+        rows = tradeable_rows(ladder)
+        if TOP_N_LIQUID_PER_EVENT:
+            top = heapq.nlargest(TOP_N_LIQUID_PER_EVENT, rows, key=lambda c: c[0])
+        else:
+            top = sorted(rows, key=lambda c: c[0], reverse=True)
+
+        if not top:
             print(f"{series} | {evt_ticker}: filtered out all strikes (spreads too wide or liquidity too low)")
             continue
 
-        # keep top n by liquidity
-        filtered.sort(key=lambda x: x.get("liquidity", 0), reverse=True)
-        if TOP_N_LIQUID_PER_EVENT:
-            filtered = filtered[:TOP_N_LIQUID_PER_EVENT]
+        # annotate survivors in place, the parsed page dicts aren't shared with anything else
+        filtered = []
+        for _, ys, ns, m in top:
+            m["_yes_spread"] = ys
+            m["_no_spread"] = ns
+            m["_event_ticker"] = evt_ticker
+            filtered.append(m)
 
         pool.extend(filtered)
 
         # print summary
         close_time_str = filtered[0].get('close_time', '') if filtered else ''
         close_ts = parse_iso_utc(close_time_str)
-        minutes_until_close = (close_ts - time.time()) / 60 if close_ts != float("inf") else 0
+        minutes_until_close = (close_ts - now_ts) / 60 if close_ts != float("inf") else 0
         
         print(f"\nSeries: {series} | Event: {evt_ticker} | kept={len(filtered)}")
         print(f"  Closes in: {minutes_until_close:.1f} minutes ({close_time_str})")
@@ -193,8 +230,8 @@ if __name__ == "__main__":
     pool = build_pool()
 
     out_path = "pool.json"
-    with open(out_path, "w") as f:
-        json.dump(pool, f, indent=2)
+    with open(out_path, "wb") as f:
+        f.write(orjson.dumps(pool, option=orjson.OPT_INDENT_2))
 
     print(f"\n{'='*70}")
     print(f"wrote pool with {len(pool)} markets -> {out_path}")